@@ -1,6 +1,6 @@
 use std::collections::HashMap;
 use std::fs::{self, File};
-use std::io::BufWriter;
+use std::io::{BufWriter, Write};
 use std::path::PathBuf;
 
 use anyhow::Context;
@@ -13,13 +13,15 @@ use crate::{
     error::AppError,
     flags::{normalize_flag_value, severity_rank},
     ioc::load_ioc_entries,
-    project_io::read_project_dataframe,
-    search::{build_search_mask_boolean, to_rpn, tokenize_search_query, SearchToken},
+    search::{
+        build_search_mask_boolean, build_searchable_text, ensure_column_text_cache, extract_terms,
+        to_rpn, tokenize_search_query,
+    },
     state::AppState,
     storage::load_flags,
 };
 
-use super::utils::build_row_search_text;
+const EXPORT_CHUNK_ROWS: usize = 50_000;
 
 #[derive(Debug, Deserialize)]
 pub struct ExportProjectPayload {
@@ -29,7 +31,7 @@ pub struct ExportProjectPayload {
 }
 
 /// Exports the project data with derived trivium columns to a CSV file.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn export_project(state: State<AppState>, payload: ExportProjectPayload) -> Result<(), String> {
     let meta = state
         .projects
@@ -37,75 +39,94 @@ pub fn export_project(state: State<AppState>, payload: ExportProjectPayload) ->
         .ok_or_else(|| AppError::Message("Project not found.".into()))?;
     let project_dir = state.projects.project_dir(&meta.id);
     let parquet_path = project_dir.join("data.parquet");
-    let mut df = read_project_dataframe(&parquet_path).map_err(AppError::from)?;
+    let mut df = state
+        .frames
+        .get_or_load(&meta.id, &parquet_path)
+        .map_err(AppError::from)?;
     let flags_path = project_dir.join("flags.json");
-    let flags = load_flags(&flags_path).map_err(AppError::from)?;
-    let iocs = load_ioc_entries(&project_dir).map_err(AppError::from)?;
+    let (flags, iocs) = {
+        // Hold the project lock while the flags db is open so a concurrent
+        // delete cannot close it underneath this read
+        let lock = state.frames.project_lock(&meta.id);
+        let _guard = lock.lock();
+        if state.projects.find(&meta.id).is_none() {
+            return Err(AppError::Message("Project not found.".into()).into());
+        }
+        (
+            load_flags(&flags_path).map_err(AppError::from)?,
+            load_ioc_entries(&project_dir).map_err(AppError::from)?,
+        )
+    };
 
     let mut safe_flags: Vec<i32> = vec![0; df.height()];
     let mut suspicious_flags: Vec<i32> = vec![0; df.height()];
     let mut critical_flags: Vec<i32> = vec![0; df.height()];
     let mut memo_series: Vec<String> = vec![String::new(); df.height()];
 
+    // Same IOC scope as row queries and the applied counter: every data column
     let column_names: Vec<String> = df
         .get_column_names()
         .iter()
+        .filter(|name| **name != "__rowid")
         .map(|s| s.to_string())
         .collect();
     let column_series: HashMap<&str, &Series> =
         df.get_columns().iter().map(|s| (s.name(), s)).collect();
 
-    for i in 0..df.height() {
-        let mut ioc_flag = String::new();
-        let mut ioc_rank = 0;
-        let mut memo_tags = Vec::new();
-
-        if !iocs.is_empty() {
-            let (row_text, single_per_col) =
-                build_row_search_text(&column_names, &column_series, i);
-            let single_row = vec![row_text];
-            for ioc_entry in &iocs {
-                let query = ioc_entry.query.trim();
-                if query.is_empty() {
+    // Evaluate each IOC rule once over the whole frame, then merge per row
+    let row_count = df.height();
+    let mut ioc_rank_vec: Vec<u8> = vec![0; row_count];
+    let mut ioc_flag_vec: Vec<String> = vec![String::new(); row_count];
+    let mut memo_tags_vec: Vec<Vec<String>> = vec![Vec::new(); row_count];
+    if !iocs.is_empty() {
+        let column_series_lower: HashMap<String, &Series> = df
+            .get_columns()
+            .iter()
+            .map(|s| (s.name().to_lowercase(), s))
+            .collect();
+        let searchable_text = build_searchable_text(row_count, &column_names, &column_series);
+        let mut per_column_text: HashMap<String, Vec<String>> = HashMap::new();
+        for ioc_entry in &iocs {
+            let query = ioc_entry.query.trim();
+            if query.is_empty() {
+                continue;
+            }
+            let tokens = tokenize_search_query(query);
+            let (terms, needed_cols) = extract_terms(&tokens);
+            if terms.is_empty() {
+                continue;
+            }
+            for c in needed_cols {
+                ensure_column_text_cache(&c, &column_series_lower, &mut per_column_text, row_count);
+            }
+            let rpn = to_rpn(&tokens);
+            let mask =
+                build_search_mask_boolean(&rpn, &terms, &searchable_text, Some(&per_column_text));
+
+            let severity = normalize_flag_value(&ioc_entry.flag);
+            let severity_rank_value = severity_rank(&severity);
+            let tag = ioc_entry.tag.trim();
+            let tag_token = (!tag.is_empty()).then(|| format!("[{}]", tag));
+            for (i, matched) in mask.iter().enumerate() {
+                if !*matched {
                     continue;
                 }
-                let tokens = tokenize_search_query(query);
-                let mut terms: Vec<(Option<String>, String)> = Vec::new();
-                for t in &tokens {
-                    if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } =
-                        t
-                    {
-                        let key = (col.clone(), text.clone());
-                        if !text.is_empty() && !terms.contains(&key) {
-                            terms.push(key);
-                        }
-                    }
-                }
-                if terms.is_empty() {
-                    continue;
+                if severity_rank_value > ioc_rank_vec[i] {
+                    ioc_rank_vec[i] = severity_rank_value;
+                    ioc_flag_vec[i] = severity.clone();
                 }
-                let rpn = to_rpn(&tokens);
-                let mask =
-                    build_search_mask_boolean(&rpn, &terms, &single_row, Some(&single_per_col));
-                let row_matches = mask.get(0).copied().unwrap_or(false);
-
-                if row_matches {
-                    let severity = normalize_flag_value(&ioc_entry.flag);
-                    let severity_rank_value = severity_rank(&severity);
-                    if severity_rank_value > ioc_rank {
-                        ioc_rank = severity_rank_value;
-                        ioc_flag = severity.clone();
-                    }
-                    let tag = ioc_entry.tag.trim();
-                    if !tag.is_empty() {
-                        let token = format!("[{}]", tag);
-                        if !memo_tags.contains(&token) {
-                            memo_tags.push(token);
-                        }
+                if let Some(token) = &tag_token {
+                    if !memo_tags_vec[i].contains(token) {
+                        memo_tags_vec[i].push(token.clone());
                     }
                 }
             }
         }
+    }
+
+    for i in 0..row_count {
+        let ioc_flag = std::mem::take(&mut ioc_flag_vec[i]);
+        let memo_tags = std::mem::take(&mut memo_tags_vec[i]);
 
         let final_flag: String;
         let mut final_memo: String;
@@ -146,18 +167,6 @@ pub fn export_project(state: State<AppState>, payload: ExportProjectPayload) ->
         df = next;
     }
 
-    let mut out_cols: Vec<Series> = Vec::new();
-    out_cols.push(Series::new("trivium-safe", safe_flags));
-    out_cols.push(Series::new("trivium-suspicious", suspicious_flags));
-    out_cols.push(Series::new("trivium-critical", critical_flags));
-    out_cols.push(Series::new("trivium-memo", memo_series));
-    for name in df.get_column_names() {
-        if let Ok(series) = df.column(name) {
-            out_cols.push(series.clone());
-        }
-    }
-    df = DataFrame::new(out_cols).map_err(|e| AppError::Other(e.into()))?;
-
     let destination = PathBuf::from(payload.destination);
     if let Some(parent) = destination.parent() {
         fs::create_dir_all(parent)
@@ -168,11 +177,40 @@ pub fn export_project(state: State<AppState>, payload: ExportProjectPayload) ->
     let file = File::create(&destination)
         .with_context(|| format!("failed to create export file {:?}", destination))
         .map_err(AppError::from)?;
-    let mut writer = CsvWriter::new(BufWriter::new(file));
-    let mut df_out = df.clone();
+    let mut writer = BufWriter::new(file);
+
+    // Assemble and write the output in row chunks so only one chunk of the
+    // derived trivium columns is materialized as Series at a time
+    let height = df.height();
+    let mut start = 0;
+    loop {
+        let len = EXPORT_CHUNK_ROWS.min(height - start);
+        let end = start + len;
+        let mut out_cols: Vec<Series> = Vec::with_capacity(df.width() + 4);
+        out_cols.push(Series::new("trivium-safe", &safe_flags[start..end]));
+        out_cols.push(Series::new(
+            "trivium-suspicious",
+            &suspicious_flags[start..end],
+        ));
+        out_cols.push(Series::new("trivium-critical", &critical_flags[start..end]));
+        out_cols.push(Series::new("trivium-memo", &memo_series[start..end]));
+        for series in df.slice(start as i64, len).get_columns() {
+            out_cols.push(series.clone());
+        }
+        let mut chunk_df = DataFrame::new(out_cols).map_err(|e| AppError::Other(e.into()))?;
+        CsvWriter::new(&mut writer)
+            .include_header(start == 0)
+            .finish(&mut chunk_df)
+            .context("failed to write export CSV")
+            .map_err(AppError::from)?;
+        start = end;
+        if start >= height {
+            break;
+        }
+    }
     writer
-        .finish(&mut df_out)
-        .context("failed to write export CSV")
+        .flush()
+        .context("failed to flush export CSV")
         .map_err(AppError::from)?;
     Ok(())
 }
@@ -4,12 +4,12 @@ use uuid::Uuid;
 
 use crate::{
     error::AppError,
+    flags::{normalize_flag_value, severity_rank},
     ioc::calculate_ioc_applied_records,
     models::{FlagEntry, ProjectRow},
-    project_io::read_project_dataframe,
     state::AppState,
     storage::{
-        clear_ioc_flag_cache, clear_searchable_cache, count_flagged, remove_flag, upsert_flag,
+        clear_ioc_flag_cache, clear_searchable_cache, flush_flags, remove_flag, upsert_flag,
     },
 };
 
@@ -32,7 +32,7 @@ pub struct HiddenColumnsPayload {
 }
 
 /// Applies or clears a user flag for a single row and updates counters.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn update_flag(
     state: State<AppState>,
     payload: UpdateFlagPayload,
@@ -49,15 +49,26 @@ pub fn update_flag(
             .map(|m| m.trim().is_empty())
             .unwrap_or(true);
 
-    if should_clear {
-        remove_flag(&flags_path, payload.row_index).map_err(AppError::from)?;
+    // Load the frame before taking the project lock; get_or_load takes it on a miss
+    let parquet_path = project_dir.join("data.parquet");
+    let df = state
+        .frames
+        .get_or_load(&payload.project_id, &parquet_path)
+        .map_err(AppError::from)?;
+    let lock = state.frames.project_lock(&payload.project_id);
+    let _guard = lock.lock();
+    if state.projects.find(&payload.project_id).is_none() {
+        return Err(AppError::Message("Project not found.".into()).into());
+    }
+    let previous = if should_clear {
+        remove_flag(&flags_path, payload.row_index).map_err(AppError::from)?
     } else {
         let entry = FlagEntry {
             flag: payload.flag.clone(),
             memo: payload.memo.clone(),
         };
-        upsert_flag(&flags_path, payload.row_index, &entry).map_err(AppError::from)?;
-    }
+        upsert_flag(&flags_path, payload.row_index, &entry).map_err(AppError::from)?
+    };
 
     if let Err(err) = clear_ioc_flag_cache(&project_dir) {
         eprintln!(
@@ -66,21 +77,38 @@ pub fn update_flag(
         );
     }
 
-    let flagged_records = count_flagged(&flags_path).map_err(AppError::from)?;
+    let rank = if should_clear {
+        0
+    } else {
+        severity_rank(&normalize_flag_value(&payload.flag))
+    };
     state
-        .projects
-        .update_flagged_records(&payload.project_id, flagged_records)
-        .map_err(AppError::from)?;
+        .frames
+        .set_user_flag(&payload.project_id, payload.row_index, rank);
+
+    let was_flagged = previous
+        .as_ref()
+        .map(|entry| !entry.flag.trim().is_empty())
+        .unwrap_or(false);
+    let is_flagged = !should_clear && !payload.flag.trim().is_empty();
+    let delta = is_flagged as isize - was_flagged as isize;
+    if delta != 0 {
+        // projects.json is written synchronously, so make the flag durable first;
+        // otherwise a crash could leave the counter out of step with the flags db
+        flush_flags(&flags_path).map_err(AppError::from)?;
+        state
+            .projects
+            .adjust_flagged_records(&payload.project_id, delta)
+            .map_err(AppError::from)?;
+    }
 
     let ioc_applied_records =
-        calculate_ioc_applied_records(&project_dir).map_err(AppError::from)?;
+        calculate_ioc_applied_records(&df, &project_dir).map_err(AppError::from)?;
     state
         .projects
         .update_ioc_applied_records(&payload.project_id, ioc_applied_records)
         .map_err(AppError::from)?;
 
-    let parquet_path = project_dir.join("data.parquet");
-    let df = read_project_dataframe(&parquet_path).map_err(AppError::from)?;
     let column_names: Vec<String> = df
         .get_column_names()
         .iter()
@@ -98,11 +126,14 @@ pub fn update_flag(
 }
 
 /// Persists the set of hidden columns for a project and resets search cache.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn set_hidden_columns(
     state: State<AppState>,
     payload: HiddenColumnsPayload,
 ) -> Result<(), String> {
+    // Async because the project lock can be held by a running query
+    let lock = state.frames.project_lock(&payload.project_id);
+    let _guard = lock.lock();
     let Some(_) = state.projects.find(&payload.project_id) else {
         return Err(AppError::Message("Project not found.".into()).into());
     };
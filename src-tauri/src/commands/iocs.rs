@@ -37,13 +37,22 @@ pub struct ExportIocsPayload {
 }
 
 /// Normalizes and persists IOC definitions, updating cached counts.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn save_iocs(state: State<AppState>, payload: SaveIocsPayload) -> Result<(), String> {
     let Some(meta) = state.projects.find(&payload.project_id) else {
         return Err(AppError::Message("Project not found.".into()).into());
     };
     let project_dir = state.projects.project_dir(&meta.id);
     let entries = prepare_ioc_entries(payload.entries);
+    let df = state
+        .frames
+        .get_or_load(&meta.id, &project_dir.join("data.parquet"))
+        .map_err(AppError::from)?;
+    let lock = state.frames.project_lock(&meta.id);
+    let _guard = lock.lock();
+    if state.projects.find(&meta.id).is_none() {
+        return Err(AppError::Message("Project not found.".into()).into());
+    }
     save_ioc_entries(&project_dir, &entries).map_err(AppError::from)?;
 
     if let Err(err) = clear_ioc_flag_cache(&project_dir) {
@@ -54,7 +63,7 @@ pub fn save_iocs(state: State<AppState>, payload: SaveIocsPayload) -> Result<(),
     }
 
     let ioc_applied_records =
-        calculate_ioc_applied_records(&project_dir).map_err(AppError::from)?;
+        calculate_ioc_applied_records(&df, &project_dir).map_err(AppError::from)?;
     state
         .projects
         .update_ioc_applied_records(&payload.project_id, ioc_applied_records)
@@ -64,7 +73,7 @@ pub fn save_iocs(state: State<AppState>, payload: SaveIocsPayload) -> Result<(),
 }
 
 /// Imports IOC rules from a CSV, replacing the current set.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn import_iocs(
     state: State<AppState>,
     payload: ImportIocsPayload,
@@ -78,6 +87,15 @@ pub fn import_iocs(
         return Err(AppError::Message("Selected file does not exist.".into()).into());
     }
     let entries = prepare_ioc_entries(read_ioc_csv(&source).map_err(AppError::from)?);
+    let df = state
+        .frames
+        .get_or_load(&meta.id, &project_dir.join("data.parquet"))
+        .map_err(AppError::from)?;
+    let lock = state.frames.project_lock(&meta.id);
+    let _guard = lock.lock();
+    if state.projects.find(&meta.id).is_none() {
+        return Err(AppError::Message("Project not found.".into()).into());
+    }
     save_ioc_entries(&project_dir, &entries).map_err(AppError::from)?;
 
     if let Err(err) = clear_ioc_flag_cache(&project_dir) {
@@ -88,7 +106,7 @@ pub fn import_iocs(
     }
 
     let ioc_applied_records =
-        calculate_ioc_applied_records(&project_dir).map_err(AppError::from)?;
+        calculate_ioc_applied_records(&df, &project_dir).map_err(AppError::from)?;
     state
         .projects
         .update_ioc_applied_records(&payload.project_id, ioc_applied_records)
@@ -1,6 +1,7 @@
 use std::collections::HashMap;
-use std::fs::{self, File};
-use std::path::PathBuf;
+use std::fs;
+use std::ops::Range;
+use std::path::{Path, PathBuf};
 
 use anyhow::Context;
 use chrono::Utc;
@@ -14,28 +15,35 @@ use crate::{
     flags::normalize_flag_value,
     ioc::{apply_iocs_to_rows, load_ioc_entries},
     models::{FlagEntry, LoadProjectResponse, ProjectMeta, ProjectRow, ProjectSummary},
-    project_io::{read_project_dataframe, write_project_dataframe},
+    project_io::{import_csv_to_parquet, scan_csv, scan_project_metrics},
     state::AppState,
     storage::{
-        clear_ioc_flag_cache, clear_searchable_cache, compute_column_max_chars,
-        load_column_metrics, load_flags, save_column_metrics, save_flags,
+        clear_ioc_flag_cache, clear_searchable_cache, close_project_dbs, compute_column_max_chars,
+        load_column_metrics, load_flags_for_rows, save_column_metrics, save_flags,
     },
     value_utils::anyvalue_to_search_string,
 };
 
-use super::{utils::collect_row_record, DEFAULT_PAGE_SIZE};
+use super::{utils::collect_frame_records, DEFAULT_PAGE_SIZE};
 
 const COLUMN_METRICS_FILE: &str = "column_max_chars.json";
+const TRIVIUM_COLUMNS: [&str; 4] = [
+    "trivium-safe",
+    "trivium-suspicious",
+    "trivium-critical",
+    "trivium-memo",
+];
 
 fn materialize_rows(
     df: &DataFrame,
     columns: &[String],
-    row_indices: impl Iterator<Item = usize>,
+    row_range: Range<usize>,
     flags: &HashMap<usize, FlagEntry>,
 ) -> Vec<ProjectRow> {
-    let mut rows = Vec::new();
-    for row_idx in row_indices {
-        let record = collect_row_record(df, columns, row_idx);
+    let page = df.slice(row_range.start as i64, row_range.len());
+    let records = collect_frame_records(&page, columns);
+    let mut rows = Vec::with_capacity(records.len());
+    for (row_idx, record) in row_range.zip(records) {
         let flag_entry = flags.get(&row_idx);
         rows.push(ProjectRow {
             row_index: row_idx,
@@ -50,6 +58,23 @@ fn materialize_rows(
     rows
 }
 
+/// Marks rows whose trivium flag column holds a value other than empty or "0";
+/// a missing column yields an all-false mask.
+fn trivium_flag_mask(df: &DataFrame, column: &str) -> Vec<bool> {
+    match df.column(column) {
+        Ok(series) => series
+            .rechunk()
+            .iter()
+            .map(|v| {
+                anyvalue_to_search_string(&v)
+                    .map(|text| text != "0" && !text.is_empty())
+                    .unwrap_or(false)
+            })
+            .collect(),
+        Err(_) => vec![false; df.height()],
+    }
+}
+
 #[derive(Debug, Deserialize)]
 pub struct CreateProjectPayload {
     pub path: String,
@@ -69,8 +94,32 @@ pub fn list_projects(state: State<AppState>) -> Result<Vec<ProjectSummary>, Stri
     Ok(result)
 }
 
+/// Writes the parquet data, column metrics and imported flags of a new project,
+/// returning its row count.
+fn write_imported_project(
+    source_path: &Path,
+    project_dir: &Path,
+    trivium_columns: &[&str],
+    imported_flags: &HashMap<usize, FlagEntry>,
+) -> Result<usize, AppError> {
+    let parquet_path = project_dir.join("data.parquet");
+    import_csv_to_parquet(source_path, &parquet_path, trivium_columns)
+        .map_err(|_| AppError::Message("Failed to parse the CSV data.".into()))?;
+
+    // The schema is fixed after import, so compute column widths once here
+    // rather than on the first load_project; batches keep the frame itself
+    // out of memory until the project is opened
+    let (total_records, column_max_chars) = scan_project_metrics(&parquet_path)?;
+    save_column_metrics(&project_dir.join(COLUMN_METRICS_FILE), &column_max_chars)?;
+
+    if !imported_flags.is_empty() {
+        save_flags(&project_dir.join("flags.json"), imported_flags)?;
+    }
+    Ok(total_records)
+}
+
 /// Creates a new project from a CSV file and persists metadata plus optional flags.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn create_project(
     state: State<AppState>,
     payload: CreateProjectPayload,
@@ -80,117 +129,65 @@ pub fn create_project(
         return Err(AppError::Message("Selected file no longer exists.".into()).into());
     }
 
-    let file = File::open(&source_path)
-        .map_err(|e| AppError::Message(format!("Failed to open file: {}", e)))?;
-    let mut df = CsvReader::new(file)
-        .finish()
+    let csv = scan_csv(&source_path)
         .map_err(|_| AppError::Message("Failed to parse the CSV data.".into()))?;
+    let schema = csv
+        .schema()
+        .map_err(|_| AppError::Message("Failed to parse the CSV data.".into()))?;
+    let trivium_columns: Vec<&str> = TRIVIUM_COLUMNS
+        .iter()
+        .copied()
+        .filter(|name| schema.contains(name))
+        .collect();
 
     let mut imported_flags: HashMap<usize, FlagEntry> = HashMap::new();
-    let has_safe = df.get_column_names().iter().any(|c| c == &"trivium-safe");
-    let has_suspicious = df
-        .get_column_names()
-        .iter()
-        .any(|c| c == &"trivium-suspicious");
-    let has_critical = df
-        .get_column_names()
-        .iter()
-        .any(|c| c == &"trivium-critical");
-    let has_memo = df.get_column_names().iter().any(|c| c == &"trivium-memo");
-    if has_safe || has_suspicious || has_critical || has_memo {
-        let safe_col = if has_safe {
-            df.column("trivium-safe").ok()
-        } else {
-            None
-        };
-        let suspicious_col = if has_suspicious {
-            df.column("trivium-suspicious").ok()
-        } else {
-            None
-        };
-        let critical_col = if has_critical {
-            df.column("trivium-critical").ok()
-        } else {
-            None
-        };
-        let memo_col = if has_memo {
-            df.column("trivium-memo").ok()
-        } else {
-            None
+    if !trivium_columns.is_empty() {
+        // Only the trivium columns are read here; the rest of the CSV is
+        // streamed straight into parquet below
+        let trivium_df = csv
+            .clone()
+            .select(trivium_columns.iter().copied().map(col).collect::<Vec<_>>())
+            .collect()
+            .map_err(|_| AppError::Message("Failed to parse the CSV data.".into()))?;
+        // One sequential pass per trivium column instead of per-cell lookups
+        let safe_mask = trivium_flag_mask(&trivium_df, "trivium-safe");
+        let suspicious_mask = trivium_flag_mask(&trivium_df, "trivium-suspicious");
+        let critical_mask = trivium_flag_mask(&trivium_df, "trivium-critical");
+        let mut memo_values: Vec<Option<String>> = match trivium_df.column("trivium-memo") {
+            Ok(series) => series
+                .rechunk()
+                .iter()
+                .map(|v| {
+                    anyvalue_to_search_string(&v)
+                        .map(|m| m.trim().to_string())
+                        .filter(|m| !m.is_empty())
+                })
+                .collect(),
+            Err(_) => vec![None; trivium_df.height()],
         };
 
-        let height = df.height();
-        for row_idx in 0..height {
-            let mut best_flag = String::new();
-            if let Some(series) = critical_col.as_ref() {
-                if let Ok(v) = series.get(row_idx) {
-                    if let Some(text) = anyvalue_to_search_string(&v) {
-                        if text != "0" && !text.is_empty() {
-                            best_flag = "critical".to_string();
-                        }
-                    }
-                }
-            }
-            if best_flag.is_empty() {
-                if let Some(series) = suspicious_col.as_ref() {
-                    if let Ok(v) = series.get(row_idx) {
-                        if let Some(text) = anyvalue_to_search_string(&v) {
-                            if text != "0" && !text.is_empty() {
-                                best_flag = "suspicious".to_string();
-                            }
-                        }
-                    }
-                }
-            }
-            if best_flag.is_empty() {
-                if let Some(series) = safe_col.as_ref() {
-                    if let Ok(v) = series.get(row_idx) {
-                        if let Some(text) = anyvalue_to_search_string(&v) {
-                            if text != "0" && !text.is_empty() {
-                                best_flag = "safe".to_string();
-                            }
-                        }
-                    }
-                }
-            }
-            let memo_val = if let Some(series) = memo_col.as_ref() {
-                series
-                    .get(row_idx)
-                    .ok()
-                    .and_then(|v| anyvalue_to_search_string(&v))
+        for (row_idx, memo) in memo_values.iter_mut().enumerate() {
+            let best_flag = if critical_mask[row_idx] {
+                "critical"
+            } else if suspicious_mask[row_idx] {
+                "suspicious"
+            } else if safe_mask[row_idx] {
+                "safe"
             } else {
-                None
-            };
-            let flag_entry = FlagEntry {
-                flag: best_flag.clone(),
-                memo: memo_val
-                    .map(|m| m.trim().to_string())
-                    .filter(|m| !m.is_empty()),
+                ""
             };
-            if !flag_entry.flag.is_empty() || flag_entry.memo.is_some() {
-                imported_flags.insert(row_idx, flag_entry);
+            if !best_flag.is_empty() || memo.is_some() {
+                imported_flags.insert(
+                    row_idx,
+                    FlagEntry {
+                        flag: best_flag.to_string(),
+                        memo: memo.take(),
+                    },
+                );
             }
         }
-
-        if let Ok(next) = df.drop("trivium-safe") {
-            df = next;
-        }
-        if let Ok(next) = df.drop("trivium-suspicious") {
-            df = next;
-        }
-        if let Ok(next) = df.drop("trivium-critical") {
-            df = next;
-        }
-        if let Ok(next) = df.drop("trivium-memo") {
-            df = next;
-        }
     }
 
-    let row_ids: Vec<i64> = (0..df.height()).map(|idx| idx as i64).collect();
-    let row_id_series = Series::new("__rowid", row_ids);
-    df.with_column(row_id_series)
-        .map_err(|_| AppError::Message("Failed to add row ids to the dataset.".into()))?;
-
     let project_id = Uuid::new_v4();
     let project_dir = state.projects.project_dir(&project_id);
     if !project_dir.exists() {
@@ -199,6 +196,21 @@ pub fn create_project(
             .map_err(AppError::from)?;
     }
 
+    let total_records = match write_imported_project(
+        &source_path,
+        &project_dir,
+        &trivium_columns,
+        &imported_flags,
+    ) {
+        Ok(total_records) => total_records,
+        Err(err) => {
+            // Nothing references the project yet, so drop its partial files
+            close_project_dbs(&project_dir);
+            let _ = fs::remove_dir_all(&project_dir);
+            return Err(err.into());
+        }
+    };
+
     let metadata = ProjectMeta {
         id: project_id,
         name: source_path
@@ -207,7 +219,7 @@ pub fn create_project(
             .unwrap_or_else(|| "Imported Project".to_string()),
         description: payload.description.clone(),
         created_at: Utc::now(),
-        total_records: df.height(),
+        total_records,
         flagged_records: imported_flags
             .values()
             .filter(|entry| !entry.flag.trim().is_empty())
@@ -216,14 +228,6 @@ pub fn create_project(
         hidden_columns: Vec::new(),
     };
 
-    let parquet_path = project_dir.join("data.parquet");
-    write_project_dataframe(&parquet_path, &mut df).map_err(AppError::from)?;
-
-    let flags_path = project_dir.join("flags.json");
-    if !imported_flags.is_empty() {
-        save_flags(&flags_path, &imported_flags).map_err(AppError::from)?;
-    }
-
     state
         .projects
         .insert(metadata.clone())
@@ -239,11 +243,14 @@ pub struct ProjectRequest {
 }
 
 /// Removes a project directory and clears related caches.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn delete_project(state: State<AppState>, request: ProjectRequest) -> Result<(), String> {
     let Some(meta) = state.projects.find(&request.project_id) else {
         return Ok(());
     };
+    let lock = state.frames.project_lock(&meta.id);
+    let _guard = lock.lock();
+    state.frames.evict(&meta.id);
     let project_dir = state.projects.project_dir(&meta.id);
     if let Err(err) = clear_searchable_cache(&project_dir) {
         eprintln!(
@@ -257,17 +264,19 @@ pub fn delete_project(state: State<AppState>, request: ProjectRequest) -> Result
             project_dir, err
         );
     }
+    close_project_dbs(&project_dir);
     if project_dir.exists() {
         fs::remove_dir_all(&project_dir)
             .with_context(|| format!("failed to remove project dir {:?}", project_dir))
             .map_err(AppError::from)?;
     }
     state.projects.remove(&meta.id).map_err(AppError::from)?;
+    state.frames.remove_project_lock(&meta.id);
     Ok(())
 }
 
 /// Loads project metadata, initial rows, IOC entries, and column metrics.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn load_project(
     state: State<AppState>,
     request: ProjectRequest,
@@ -282,7 +291,10 @@ pub fn load_project(
         return Err(AppError::Message("Project data file missing.".into()).into());
     }
 
-    let df = read_project_dataframe(&parquet_path).map_err(AppError::from)?;
+    let df = state
+        .frames
+        .get_or_load(&meta.id, &parquet_path)
+        .map_err(AppError::from)?;
     let columns: Vec<String> = df
         .get_column_names()
         .into_iter()
@@ -290,8 +302,13 @@ pub fn load_project(
         .map(|name| name.to_string())
         .collect();
 
-    let flags_path = project_dir.join("flags.json");
-    let flags = load_flags(&flags_path).map_err(AppError::from)?;
+    // Project files and databases are only touched under the project lock so a
+    // concurrent delete cannot remove them mid-read
+    let lock = state.frames.project_lock(&meta.id);
+    let _guard = lock.lock();
+    if state.projects.find(&meta.id).is_none() {
+        return Err(AppError::Message("Project not found.".into()).into());
+    }
 
     let metrics_path = project_dir.join(COLUMN_METRICS_FILE);
     let mut column_max_chars = match load_column_metrics(&metrics_path).map_err(AppError::from)? {
@@ -313,6 +330,9 @@ pub fn load_project(
     let iocs = load_ioc_entries(&project_dir).map_err(AppError::from)?;
 
     let page_limit = usize::min(DEFAULT_PAGE_SIZE, df.height());
+    let page_indices: Vec<usize> = (0..page_limit).collect();
+    let flags_path = project_dir.join("flags.json");
+    let flags = load_flags_for_rows(&flags_path, &page_indices).map_err(AppError::from)?;
     let mut initial_rows = materialize_rows(&df, &columns, 0..page_limit, &flags);
     apply_iocs_to_rows(&mut initial_rows, &iocs);
 
@@ -1,4 +1,5 @@
 use std::collections::HashMap;
+use std::sync::Arc;
 
 use anyhow::Error as AnyhowError;
 
@@ -9,26 +10,23 @@ use uuid::Uuid;
 
 use crate::{
     error::AppError,
-    flags::{normalize_flag_value, severity_rank},
+    flags::{flag_from_rank, normalize_flag_value, severity_rank},
     ioc::load_ioc_entries,
     models::{FlagEntry, ProjectRow},
-    project_io::read_project_dataframe,
     search::{
-        build_search_mask_boolean, ensure_searchable_text, to_rpn, tokenize_search_query,
-        SearchToken,
+        build_search_mask_boolean, build_searchable_text, ensure_column_text_cache,
+        ensure_searchable_text, extract_terms, to_rpn, tokenize_search_query,
     },
     state::AppState,
     storage::{
-        load_flags, load_ioc_flag_cache, load_searchable_cache, save_ioc_flag_cache,
-        save_searchable_cache,
+        load_flags, load_flags_for_rows, load_ioc_flag_cache, load_searchable_cache,
+        save_ioc_flag_cache, save_searchable_cache,
     },
     value_utils::anyvalue_to_search_string,
 };
 
 use super::{
-    utils::{
-        build_row_search_text, collect_row_record_from_series, ensure_column_text_cache,
-    },
+    utils::{build_row_search_text, collect_frame_records},
     DEFAULT_PAGE_SIZE,
 };
 
@@ -72,7 +70,7 @@ pub struct QueryRowsResponse {
 }
 
 /// Streams project rows with filtering, sorting, IOC application, and pagination.
-#[tauri::command]
+#[tauri::command(async)]
 pub fn query_project_rows(
     state: State<AppState>,
     payload: QueryRowsPayload,
@@ -87,7 +85,10 @@ pub fn query_project_rows(
         return Err(AppError::Message("Project data file missing.".into()).into());
     }
 
-    let df = read_project_dataframe(&parquet_path).map_err(AppError::from)?;
+    let df = state
+        .frames
+        .get_or_load(&meta.id, &parquet_path)
+        .map_err(AppError::from)?;
     let columns: Vec<String> = df
         .get_column_names()
         .into_iter()
@@ -96,8 +97,6 @@ pub fn query_project_rows(
         .collect();
 
     let flags_path = project_dir.join("flags.json");
-    let flags = load_flags(&flags_path).map_err(AppError::from)?;
-    let iocs = load_ioc_entries(&project_dir).map_err(AppError::from)?;
 
     let offset = payload.offset.unwrap_or(0);
     let limit = payload.limit.unwrap_or(DEFAULT_PAGE_SIZE).max(1);
@@ -122,14 +121,23 @@ pub fn query_project_rows(
         .cloned()
         .unwrap_or_else(|| column_names.clone());
     let row_count = df.height();
-    let cached_search = match load_searchable_cache(&project_dir) {
-        Ok(cache) => cache,
-        Err(err) => {
-            eprintln!(
-                "[cache] failed to load searchable cache for {:?}: {:?}",
-                project_dir, err
-            );
-            None
+    // Every access to the project's databases happens under its lock so that
+    // delete_project never closes a handle that is still in use
+    let project_lock = state.frames.project_lock(&meta.id);
+    let cached_search = {
+        let _guard = project_lock.lock();
+        if state.projects.find(&meta.id).is_none() {
+            return Err(AppError::Message("Project not found.".into()).into());
+        }
+        match load_searchable_cache(&project_dir, &search_cols) {
+            Ok(cache) => cache,
+            Err(err) => {
+                eprintln!(
+                    "[cache] failed to load searchable cache for {:?}: {:?}",
+                    project_dir, err
+                );
+                None
+            }
         }
     };
     let mut searchable_text: Option<Vec<String>> = cached_search.and_then(|cached| {
@@ -150,21 +158,7 @@ pub fn query_project_rows(
         .filter(|s| !s.is_empty())
     {
         let tokens = tokenize_search_query(&search_str_raw);
-        let mut terms: Vec<(Option<String>, String)> = Vec::new();
-        let mut needed_cols: Vec<String> = Vec::new();
-        for token in &tokens {
-            if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } = token {
-                let key = (col.clone(), text.clone());
-                if !text.is_empty() && !terms.contains(&key) {
-                    terms.push(key);
-                }
-                if let Some(column_name) = col {
-                    if !needed_cols.contains(column_name) {
-                        needed_cols.push(column_name.clone());
-                    }
-                }
-            }
-        }
+        let (terms, needed_cols) = extract_terms(&tokens);
         for column in needed_cols {
             ensure_column_text_cache(
                 &column,
@@ -182,18 +176,37 @@ pub fn query_project_rows(
                 &search_cols,
                 &column_series,
             );
-            let mask =
-                build_search_mask_boolean(&rpn, &terms, search_text, Some(&per_column_text));
+            let mask = build_search_mask_boolean(&rpn, &terms, search_text, Some(&per_column_text));
             search_mask = Some(mask);
         }
     }
 
-    let mut user_flag_vec: Vec<String> = vec![String::new(); df.height()];
-    for (idx, entry) in flags.iter() {
-        if *idx < df.height() {
-            user_flag_vec[*idx] = normalize_flag_value(&entry.flag);
-        }
+    // Flag ranks and the IOC cache are read, rebuilt and persisted under the
+    // project lock so a concurrent flag edit, IOC save or delete cannot
+    // interleave and leave a stale cache behind
+    let project_guard = project_lock.lock();
+    if state.projects.find(&meta.id).is_none() {
+        return Err(AppError::Message("Project not found.".into()).into());
     }
+    let iocs = load_ioc_entries(&project_dir).map_err(AppError::from)?;
+
+    // Per-row user flag ranks live next to the cached frame, so the flags
+    // store is only scanned the first time a project is queried
+    let user_flag_ranks = match state.frames.user_flags(&meta.id) {
+        Some(ranks) if ranks.len() == row_count => ranks,
+        _ => {
+            let flags = load_flags(&flags_path).map_err(AppError::from)?;
+            let mut ranks = vec![0u8; row_count];
+            for (idx, entry) in flags.iter() {
+                if *idx < row_count {
+                    ranks[*idx] = severity_rank(&normalize_flag_value(&entry.flag));
+                }
+            }
+            let ranks = Arc::new(ranks);
+            state.frames.set_user_flags(&meta.id, ranks.clone());
+            ranks
+        }
+    };
 
     let cached_ioc_flags = match load_ioc_flag_cache(&project_dir) {
         Ok(cache) => cache,
@@ -205,34 +218,23 @@ pub fn query_project_rows(
             None
         }
     };
-    let mut ioc_flag_vec: Vec<String> = cached_ioc_flags
+    let mut ioc_flag_ranks: Vec<u8> = cached_ioc_flags
         .filter(|cached| cached.len() == row_count)
-        .unwrap_or_else(|| vec![String::new(); row_count]);
+        .unwrap_or_else(|| vec![0u8; row_count]);
     let mut sorted_iocs = iocs.clone();
     sorted_iocs.sort_by_key(|e| std::cmp::Reverse(severity_rank(&normalize_flag_value(&e.flag))));
-    let need_rebuild_ioc = ioc_flag_vec.iter().all(|s| s.is_empty());
+    let need_rebuild_ioc = ioc_flag_ranks.iter().all(|&rank| rank == 0);
     if need_rebuild_ioc {
+        // IOC rules match against every column regardless of which columns the
+        // search is limited to, so they only share its text when the scopes agree
+        let mut ioc_text: Option<Vec<String>> = None;
         for ioc_entry in &sorted_iocs {
             let query = ioc_entry.query.trim();
             if query.is_empty() {
                 continue;
             }
             let tokens = tokenize_search_query(query);
-            let mut terms: Vec<(Option<String>, String)> = Vec::new();
-            let mut needed_cols: Vec<String> = Vec::new();
-            for t in &tokens {
-                if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } = t {
-                    let key = (col.clone(), text.clone());
-                    if !text.is_empty() && !terms.contains(&key) {
-                        terms.push(key);
-                    }
-                    if let Some(c) = col {
-                        if !needed_cols.contains(c) {
-                            needed_cols.push(c.clone());
-                        }
-                    }
-                }
-            }
+            let (terms, needed_cols) = extract_terms(&tokens);
             for c in needed_cols {
                 ensure_column_text_cache(
                     &c,
@@ -245,85 +247,54 @@ pub fn query_project_rows(
                 continue;
             }
             let rpn = to_rpn(&tokens);
-            let search_text = ensure_searchable_text(
-                &mut searchable_text,
-                &mut searchable_text_built,
-                row_count,
-                &search_cols,
-                &column_series,
-            );
-            let mask = build_search_mask_boolean(&rpn, &terms, search_text, Some(&per_column_text));
+            let ioc_search_text = if search_cols == column_names {
+                ensure_searchable_text(
+                    &mut searchable_text,
+                    &mut searchable_text_built,
+                    row_count,
+                    &search_cols,
+                    &column_series,
+                )
+            } else {
+                ioc_text.get_or_insert_with(|| {
+                    build_searchable_text(row_count, &column_names, &column_series)
+                })
+            };
+            let mask =
+                build_search_mask_boolean(&rpn, &terms, ioc_search_text, Some(&per_column_text));
+            let ioc_rank = severity_rank(&normalize_flag_value(&ioc_entry.flag));
             for i in 0..df.height() {
-                if !ioc_flag_vec[i].is_empty() || !user_flag_vec[i].is_empty() {
+                if ioc_flag_ranks[i] != 0 || user_flag_ranks[i] != 0 {
                     continue;
                 }
                 if mask.get(i).copied().unwrap_or(false) {
-                    ioc_flag_vec[i] = normalize_flag_value(&ioc_entry.flag);
+                    ioc_flag_ranks[i] = ioc_rank;
                 }
             }
         }
-        if let Err(err) = save_ioc_flag_cache(&project_dir, &ioc_flag_vec) {
+        if let Err(err) = save_ioc_flag_cache(&project_dir, &ioc_flag_ranks) {
             eprintln!(
                 "[cache] failed to persist IOC cache for {:?}: {:?}",
                 project_dir, err
             );
         }
     }
+    drop(project_guard);
 
-    let mut ordered_indices: Vec<usize> = (0..df.height()).collect();
-    if let Some(sort_key) = &payload.sort_key {
-        if let Ok(series) = df.column(sort_key) {
-            ordered_indices.sort_by(|a, b| {
-                let a_s = series
-                    .get(*a)
-                    .ok()
-                    .and_then(|v| anyvalue_to_search_string(&v))
-                    .map(|s| s.trim().replace(',', "").replace('\u{00A0}', ""));
-                let b_s = series
-                    .get(*b)
-                    .ok()
-                    .and_then(|v| anyvalue_to_search_string(&v))
-                    .map(|s| s.trim().replace(',', "").replace('\u{00A0}', ""));
-
-                let a_num = a_s.as_ref().and_then(|s| s.parse::<f64>().ok());
-                let b_num = b_s.as_ref().and_then(|s| s.parse::<f64>().ok());
-
-                if a_num.is_some() || b_num.is_some() {
-                    let av = a_num.unwrap_or(f64::INFINITY);
-                    let bv = b_num.unwrap_or(f64::INFINITY);
-                    let mut ord = av.partial_cmp(&bv).unwrap_or(std::cmp::Ordering::Equal);
-                    if payload.sort_direction.as_deref() == Some("desc") {
-                        ord = ord.reverse();
-                    }
-                    return ord;
-                }
-
-                let mut ord = match (&a_s, &b_s) {
-                    (Some(a_str), Some(b_str)) => a_str.to_lowercase().cmp(&b_str.to_lowercase()),
-                    (Some(_), None) => std::cmp::Ordering::Greater,
-                    (None, Some(_)) => std::cmp::Ordering::Less,
-                    (None, None) => std::cmp::Ordering::Equal,
-                };
-                if payload.sort_direction.as_deref() == Some("desc") {
-                    ord = ord.reverse();
-                }
-                ord
-            });
-        }
-    }
-
-    let mut final_flag_vec: Vec<String> = Vec::with_capacity(df.height());
-    final_flag_vec.extend((0..df.height()).map(|i| {
-        if !user_flag_vec[i].is_empty() {
-            user_flag_vec[i].clone()
-        } else {
-            ioc_flag_vec[i].clone()
-        }
-    }));
+    let final_flag_ranks: Vec<u8> = (0..df.height())
+        .map(|i| {
+            if user_flag_ranks[i] != 0 {
+                user_flag_ranks[i]
+            } else {
+                ioc_flag_ranks[i]
+            }
+        })
+        .collect();
 
+    // Filter before sorting so the sort only touches rows that can be returned
     let mut filtered_indices: Vec<usize> = Vec::with_capacity(df.height());
-    for &idx in &ordered_indices {
-        let ff = &final_flag_vec[idx];
+    for idx in 0..df.height() {
+        let ff = flag_from_rank(final_flag_ranks[idx]);
         let flag_ok = if let Some(filter) = &payload.flag_filter {
             matches_flag_filter(ff, filter)
         } else {
@@ -339,8 +310,48 @@ pub fn query_project_rows(
         }
         filtered_indices.push(idx);
     }
+
+    if let Some(sort_key) = &payload.sort_key {
+        if let Ok(series) = df.column(sort_key) {
+            let descending = payload.sort_direction.as_deref() == Some("desc");
+            // Extract each row's sort key once instead of on every comparison
+            let mut keyed: Vec<(usize, Option<f64>, Option<String>)> = filtered_indices
+                .iter()
+                .map(|&idx| {
+                    let text = series
+                        .get(idx)
+                        .ok()
+                        .and_then(|v| anyvalue_to_search_string(&v))
+                        .map(|s| s.trim().replace(',', "").replace('\u{00A0}', ""));
+                    let num = text.as_ref().and_then(|s| s.parse::<f64>().ok());
+                    (idx, num, text.map(|s| s.to_lowercase()))
+                })
+                .collect();
+            keyed.sort_by(|(_, a_num, a_s), (_, b_num, b_s)| {
+                let ord = if a_num.is_some() || b_num.is_some() {
+                    let av = a_num.unwrap_or(f64::INFINITY);
+                    let bv = b_num.unwrap_or(f64::INFINITY);
+                    av.partial_cmp(&bv).unwrap_or(std::cmp::Ordering::Equal)
+                } else {
+                    match (a_s, b_s) {
+                        (Some(a_str), Some(b_str)) => a_str.cmp(b_str),
+                        (Some(_), None) => std::cmp::Ordering::Greater,
+                        (None, Some(_)) => std::cmp::Ordering::Less,
+                        (None, None) => std::cmp::Ordering::Equal,
+                    }
+                };
+                if descending {
+                    ord.reverse()
+                } else {
+                    ord
+                }
+            });
+            filtered_indices = keyed.into_iter().map(|(idx, _, _)| idx).collect();
+        }
+    }
+
     for &idx in &filtered_indices {
-        if !final_flag_vec[idx].trim().is_empty() {
+        if final_flag_ranks[idx] != 0 {
             total_flagged_after_ioc += 1;
         }
     }
@@ -357,24 +368,22 @@ pub fn query_project_rows(
     let taken_df = df
         .take(&take_idx)
         .map_err(|err| AppError::from(AnyhowError::from(err)))?;
-    let taken_series_map: HashMap<&str, &Series> = taken_df
-        .get_columns()
-        .iter()
-        .map(|series| (series.name(), series))
-        .collect();
-    let page_flags: HashMap<usize, FlagEntry> = selected_indices
-        .iter()
-        .filter_map(|idx| flags.get(idx).cloned().map(|entry| (*idx, entry)))
-        .collect();
+    let records = collect_frame_records(&taken_df, &column_names);
+    let page_flags: HashMap<usize, FlagEntry> = {
+        let _guard = project_lock.lock();
+        if state.projects.find(&meta.id).is_none() {
+            return Err(AppError::Message("Project not found.".into()).into());
+        }
+        load_flags_for_rows(&flags_path, &selected_indices).map_err(AppError::from)?
+    };
 
-    for (position, &row_idx) in selected_indices.iter().enumerate() {
-        let record = collect_row_record_from_series(&taken_series_map, &column_names, position);
+    for (&row_idx, record) in selected_indices.iter().zip(records) {
         let user_memo = page_flags
             .get(&row_idx)
             .and_then(|e| e.memo.clone())
             .unwrap_or_default();
         let mut final_memo = user_memo;
-        if !iocs.is_empty() && final_flag_vec[row_idx] == ioc_flag_vec[row_idx] {
+        if !iocs.is_empty() && final_flag_ranks[row_idx] == ioc_flag_ranks[row_idx] {
             let mut memo_tags: Vec<String> = Vec::new();
             for ioc_entry in &iocs {
                 let query = ioc_entry.query.trim();
@@ -382,23 +391,7 @@ pub fn query_project_rows(
                     continue;
                 }
                 let tokens = tokenize_search_query(query);
-                let mut terms: Vec<(Option<String>, String)> = Vec::new();
-                let mut needed_cols: Vec<String> = Vec::new();
-                for t in &tokens {
-                    if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } =
-                        t
-                    {
-                        let key = (col.clone(), text.clone());
-                        if !text.is_empty() && !terms.contains(&key) {
-                            terms.push(key);
-                        }
-                        if let Some(c) = col {
-                            if !needed_cols.contains(c) {
-                                needed_cols.push(c.clone());
-                            }
-                        }
-                    }
-                }
+                let (terms, needed_cols) = extract_terms(&tokens);
                 if terms.is_empty() {
                     continue;
                 }
@@ -438,7 +431,7 @@ pub fn query_project_rows(
         rows.push(ProjectRow {
             row_index: row_idx,
             data: record,
-            flag: final_flag_vec[row_idx].clone(),
+            flag: flag_from_rank(final_flag_ranks[row_idx]).to_string(),
             memo: if final_memo.is_empty() {
                 None
             } else {
@@ -448,8 +441,9 @@ pub fn query_project_rows(
     }
 
     if searchable_text_built {
-        if let Some(ref built) = searchable_text {
-            if let Err(err) = save_searchable_cache(&project_dir, built) {
+        let _guard = project_lock.lock();
+        if let (Some(built), Some(_)) = (&searchable_text, state.projects.find(&meta.id)) {
+            if let Err(err) = save_searchable_cache(&project_dir, &search_cols, built) {
                 eprintln!(
                     "[cache] failed to persist searchable cache for {:?}: {:?}",
                     project_dir, err
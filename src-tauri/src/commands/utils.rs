@@ -36,31 +36,24 @@ pub(crate) fn collect_row_record_from_series(
     record
 }
 
-/// Ensures lowercase string caches exist for a column, returning the cached vector.
-pub(crate) fn ensure_column_text_cache<'a>(
-    column: &str,
-    column_series_lower: &HashMap<String, &Series>,
-    cache: &'a mut HashMap<String, Vec<String>>,
-    row_count: usize,
-) -> &'a Vec<String> {
-    let key = column.to_lowercase();
-    if !cache.contains_key(&key) {
-        let mut col_vec: Vec<String> = vec![String::new(); row_count];
-        if let Some(series) = column_series_lower.get(&key) {
-            for row_idx in 0..row_count {
-                if let Ok(value) = series.get(row_idx) {
-                    if let Some(text) = anyvalue_to_search_string(&value) {
-                        let lower = text.to_lowercase();
-                        if !lower.is_empty() {
-                            col_vec[row_idx] = lower;
-                        }
-                    }
-                }
+/// Collects every row of `df` into JSON maps, converting one column at a time.
+/// Intended for page-sized frames produced by `take`/`slice` of a cached,
+/// single-chunk frame.
+pub(crate) fn collect_frame_records(
+    df: &DataFrame,
+    column_names: &[String],
+) -> Vec<HashMap<String, Value>> {
+    let mut records: Vec<HashMap<String, Value>> = (0..df.height())
+        .map(|_| HashMap::with_capacity(column_names.len()))
+        .collect();
+    for column in column_names {
+        if let Ok(series) = df.column(column) {
+            for (record, value) in records.iter_mut().zip(series.iter()) {
+                record.insert(column.clone(), anyvalue_to_json(&value));
             }
         }
-        cache.insert(key.clone(), col_vec);
     }
-    cache.get(&key).expect("column cache must exist")
+    records
 }
 
 /// Builds concatenated row text and per-column single-row caches.
@@ -14,6 +14,15 @@ pub fn normalize_flag_value(flag: &str) -> String {
     }
 }
 
+pub fn flag_from_rank(rank: u8) -> &'static str {
+    match rank {
+        3 => "critical",
+        2 => "suspicious",
+        1 => "safe",
+        _ => "",
+    }
+}
+
 pub fn severity_rank(value: &str) -> u8 {
     match value {
         "critical" => 3,
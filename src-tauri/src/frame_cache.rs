@@ -0,0 +1,163 @@
+use std::collections::{HashMap, VecDeque};
+use std::path::Path;
+use std::sync::Arc;
+
+use anyhow::Result;
+use parking_lot::Mutex;
+use polars::prelude::DataFrame;
+use uuid::Uuid;
+
+use crate::project_io::read_project_dataframe;
+
+/// Upper bound for the estimated in-memory size of all cached project frames.
+pub const DEFAULT_FRAME_CACHE_BYTES: usize = 2 * 1024 * 1024 * 1024;
+
+struct CachedFrame {
+    df: DataFrame,
+    bytes: usize,
+    // Per-row user flag severity (see `flags::severity_rank`), loaded lazily
+    user_flags: Option<Arc<Vec<u8>>>,
+}
+
+#[derive(Default)]
+struct FrameCacheInner {
+    entries: HashMap<Uuid, CachedFrame>,
+    // Least recently used id at the front
+    order: VecDeque<Uuid>,
+    total_bytes: usize,
+}
+
+impl FrameCacheInner {
+    fn touch(&mut self, id: &Uuid) {
+        if let Some(pos) = self.order.iter().position(|entry| entry == id) {
+            self.order.remove(pos);
+        }
+        self.order.push_back(*id);
+    }
+
+    fn remove(&mut self, id: &Uuid) {
+        if let Some(entry) = self.entries.remove(id) {
+            self.total_bytes = self.total_bytes.saturating_sub(entry.bytes);
+        }
+        self.order.retain(|entry| entry != id);
+    }
+
+    /// Evicts least recently used frames other than `keep` until the cache fits
+    /// in `max_bytes`; `keep` stays even if it alone exceeds the budget.
+    fn evict_to_fit(&mut self, max_bytes: usize, keep: &Uuid) {
+        while self.total_bytes > max_bytes {
+            let Some(oldest) = self.order.iter().find(|id| *id != keep).copied() else {
+                break;
+            };
+            self.remove(&oldest);
+        }
+    }
+}
+
+/// Size-bounded LRU cache of project DataFrames keyed by project id.
+pub struct FrameCache {
+    max_bytes: usize,
+    inner: Mutex<FrameCacheInner>,
+    // Serializes loads and flag/cache mutation per project; commands run concurrently
+    project_locks: Mutex<HashMap<Uuid, Arc<Mutex<()>>>>,
+}
+
+impl FrameCache {
+    pub fn new(max_bytes: usize) -> Self {
+        Self {
+            max_bytes,
+            inner: Mutex::new(FrameCacheInner::default()),
+            project_locks: Mutex::new(HashMap::new()),
+        }
+    }
+
+    /// Returns the lock guarding loads and flag/cache mutation for project `id`.
+    pub fn project_lock(&self, id: &Uuid) -> Arc<Mutex<()>> {
+        self.project_locks.lock().entry(*id).or_default().clone()
+    }
+
+    /// Drops the lock entry for a deleted project.
+    pub fn remove_project_lock(&self, id: &Uuid) {
+        self.project_locks.lock().remove(id);
+    }
+
+    pub fn get(&self, id: &Uuid) -> Option<DataFrame> {
+        let mut guard = self.inner.lock();
+        let df = guard.entries.get(id).map(|entry| entry.df.clone())?;
+        guard.touch(id);
+        Some(df)
+    }
+
+    /// Returns the cached frame for `id`, reading it from `path` on a miss.
+    /// Concurrent misses for the same project share a single read.
+    pub fn get_or_load(&self, id: &Uuid, path: &Path) -> Result<DataFrame> {
+        if let Some(df) = self.get(id) {
+            return Ok(df);
+        }
+        let lock = self.project_lock(id);
+        let _guard = lock.lock();
+        if let Some(df) = self.get(id) {
+            return Ok(df);
+        }
+        let df = read_project_dataframe(path)?;
+        self.insert(*id, df.clone());
+        Ok(df)
+    }
+
+    /// Caches `df`, evicting least recently used frames until the byte budget is met.
+    /// The newly inserted frame is always kept, even if it alone exceeds the budget.
+    pub fn insert(&self, id: Uuid, df: DataFrame) {
+        let bytes = df.estimated_size();
+        let mut guard = self.inner.lock();
+        guard.remove(&id);
+        guard.entries.insert(
+            id,
+            CachedFrame {
+                df,
+                bytes,
+                user_flags: None,
+            },
+        );
+        guard.order.push_back(id);
+        guard.total_bytes += bytes;
+        guard.evict_to_fit(self.max_bytes, &id);
+    }
+
+    /// Returns the cached per-row user flag ranks for a cached frame, if built.
+    pub fn user_flags(&self, id: &Uuid) -> Option<Arc<Vec<u8>>> {
+        let guard = self.inner.lock();
+        guard.entries.get(id)?.user_flags.clone()
+    }
+
+    /// Attaches per-row user flag ranks to a cached frame; ignored if the frame is not cached.
+    pub fn set_user_flags(&self, id: &Uuid, ranks: Arc<Vec<u8>>) {
+        let mut guard = self.inner.lock();
+        let inner = &mut *guard;
+        if let Some(entry) = inner.entries.get_mut(id) {
+            let added = ranks.len();
+            let removed = entry.user_flags.as_ref().map(|r| r.len()).unwrap_or(0);
+            entry.user_flags = Some(ranks);
+            entry.bytes = entry.bytes + added - removed;
+            inner.total_bytes = inner.total_bytes + added - removed;
+            inner.evict_to_fit(self.max_bytes, id);
+        }
+    }
+
+    /// Updates one row's flag rank in place so cached ranks stay in sync with edits.
+    pub fn set_user_flag(&self, id: &Uuid, row_index: usize, rank: u8) {
+        let mut guard = self.inner.lock();
+        if let Some(ranks) = guard
+            .entries
+            .get_mut(id)
+            .and_then(|entry| entry.user_flags.as_mut())
+        {
+            if let Some(slot) = Arc::make_mut(ranks).get_mut(row_index) {
+                *slot = rank;
+            }
+        }
+    }
+
+    pub fn evict(&self, id: &Uuid) {
+        self.inner.lock().remove(id);
+    }
+}
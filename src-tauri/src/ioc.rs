@@ -4,13 +4,16 @@ use std::path::Path;
 
 use anyhow::{Context, Result};
 use csv::{ReaderBuilder, WriterBuilder};
+use polars::prelude::{DataFrame, Series};
 
 use crate::flags::{normalize_flag_value, severity_rank};
 use crate::models::{IocEntry, ProjectRow};
-use crate::project_io::read_project_dataframe;
-use crate::search::{build_search_mask_boolean, to_rpn, tokenize_search_query, SearchToken};
+use crate::search::{
+    build_search_mask_boolean, build_searchable_text, ensure_column_text_cache, extract_terms,
+    to_rpn, tokenize_search_query,
+};
 use crate::storage::load_flags;
-use crate::value_utils::{anyvalue_to_search_string, value_to_search_string};
+use crate::value_utils::value_to_search_string;
 
 pub fn row_contains_query(row: &ProjectRow, query: &str) -> bool {
     if query.trim().is_empty() {
@@ -36,15 +39,7 @@ pub fn row_contains_query(row: &ProjectRow, query: &str) -> bool {
     }
     // Boolean evaluation using the shared tokenizer and RPN evaluator
     let tokens = tokenize_search_query(query);
-    let mut terms: Vec<(Option<String>, String)> = Vec::new();
-    for t in &tokens {
-        if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } = t {
-            let key = (col.clone(), text.clone());
-            if !text.is_empty() && !terms.contains(&key) {
-                terms.push(key);
-            }
-        }
-    }
+    let (terms, _) = extract_terms(&tokens);
     if terms.is_empty() {
         return false;
     }
@@ -181,101 +176,67 @@ pub fn write_ioc_csv(entries: &[IocEntry], path: &Path) -> Result<()> {
     writer.flush().context("failed to flush IOC CSV writer")
 }
 
-pub fn calculate_ioc_applied_records(project_dir: &Path) -> Result<usize> {
-    let parquet_path = project_dir.join("data.parquet");
-    let df = read_project_dataframe(&parquet_path)?;
+pub fn calculate_ioc_applied_records(df: &DataFrame, project_dir: &Path) -> Result<usize> {
     let flags_path = project_dir.join("flags.json");
     let flags = load_flags(&flags_path)?;
     let iocs = load_ioc_entries(project_dir)?;
+    if iocs.is_empty() {
+        return Ok(0);
+    }
 
-    let mut ioc_applied_count = 0;
     let column_names: Vec<String> = df
         .get_column_names()
         .into_iter()
         .filter(|column| *column != "__rowid")
         .map(|column| column.to_string())
         .collect();
-
-    for row_idx in 0..df.height() {
-        let flag_entry = flags.get(&row_idx);
-        let user_flag = flag_entry
-            .as_ref()
-            .map(|entry| normalize_flag_value(&entry.flag))
-            .unwrap_or_default();
-
-        // Count IOC applications (only when no user flag exists)
-        if severity_rank(&user_flag) == 0 && !iocs.is_empty() {
-            let mut has_ioc_match = false;
-
-            // Build searchable text once for this row
-            let mut row_text = String::new();
-            for column in &column_names {
-                if let Ok(series) = df.column(column) {
-                    if let Ok(value) = series.get(row_idx) {
-                        if let Some(text) = anyvalue_to_search_string(&value) {
-                            let lower = text.to_lowercase();
-                            if !lower.is_empty() {
-                                if !row_text.is_empty() {
-                                    row_text.push(' ');
-                                }
-                                row_text.push_str(&lower);
-                            }
-                        }
-                    }
-                }
-            }
-            for entry in &iocs {
-                let query = entry.query.trim();
-                if query.is_empty() {
-                    continue;
-                }
-                let tokens = tokenize_search_query(query);
-                let mut terms: Vec<(Option<String>, String)> = Vec::new();
-                for t in &tokens {
-                    if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } =
-                        t
-                    {
-                        let key = (col.clone(), text.clone());
-                        if !text.is_empty() && !terms.contains(&key) {
-                            terms.push(key);
-                        }
-                    }
-                }
-                if terms.is_empty() {
-                    continue;
-                }
-                let rpn = to_rpn(&tokens);
-                // Build single-row per-column map
-                let mut single_per_col: HashMap<String, Vec<String>> = HashMap::new();
-                for column in &column_names {
-                    let mut s = String::new();
-                    if let Ok(series) = df.column(column) {
-                        if let Ok(v) = series.get(row_idx) {
-                            if let Some(t) = anyvalue_to_search_string(&v) {
-                                s = t.to_lowercase();
-                            }
-                        }
-                    }
-                    single_per_col.insert(column.to_lowercase(), vec![s]);
-                }
-                let mask = build_search_mask_boolean(
-                    &rpn,
-                    &terms,
-                    &vec![row_text.clone()],
-                    Some(&single_per_col),
-                );
-                if mask.get(0).copied().unwrap_or(false) {
-                    has_ioc_match = true;
-                    break;
-                }
-            }
-
-            if has_ioc_match {
-                ioc_applied_count += 1;
-            }
+    let column_series: HashMap<&str, &Series> =
+        df.get_columns().iter().map(|s| (s.name(), s)).collect();
+    let column_series_lower: HashMap<String, &Series> = df
+        .get_columns()
+        .iter()
+        .map(|s| (s.name().to_lowercase(), s))
+        .collect();
+    let row_count = df.height();
+
+    // Build searchable text column by column once, then evaluate each IOC over all rows
+    let searchable_text = build_searchable_text(row_count, &column_names, &column_series);
+    let mut per_column_text: HashMap<String, Vec<String>> = HashMap::new();
+    let mut ioc_matched = vec![false; row_count];
+    for entry in &iocs {
+        let query = entry.query.trim();
+        if query.is_empty() {
+            continue;
+        }
+        let tokens = tokenize_search_query(query);
+        let (terms, needed_cols) = extract_terms(&tokens);
+        if terms.is_empty() {
+            continue;
+        }
+        for c in needed_cols {
+            ensure_column_text_cache(&c, &column_series_lower, &mut per_column_text, row_count);
+        }
+        let rpn = to_rpn(&tokens);
+        let mask =
+            build_search_mask_boolean(&rpn, &terms, &searchable_text, Some(&per_column_text));
+        for (matched, hit) in ioc_matched.iter_mut().zip(mask) {
+            *matched = *matched || hit;
         }
     }
 
+    // IOC applications only count for rows without a user flag
+    let ioc_applied_count = ioc_matched
+        .iter()
+        .enumerate()
+        .filter(|(row_idx, matched)| {
+            let user_flag = flags
+                .get(row_idx)
+                .map(|entry| normalize_flag_value(&entry.flag))
+                .unwrap_or_default();
+            **matched && severity_rank(&user_flag) == 0
+        })
+        .count();
+
     Ok(ioc_applied_count)
 }
 
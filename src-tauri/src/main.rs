@@ -3,6 +3,7 @@
 mod commands;
 mod error;
 mod flags;
+mod frame_cache;
 mod ioc;
 mod models;
 mod project_io;
@@ -35,6 +36,11 @@ fn main() {
             commands::set_hidden_columns,
             commands::export_project
         ])
-        .run(tauri::generate_context!())
-        .expect("error while running tauri application");
+        .build(tauri::generate_context!())
+        .expect("error while building tauri application")
+        .run(|_app, event| {
+            if let tauri::RunEvent::Exit = event {
+                storage::flush_open_dbs();
+            }
+        });
 }
@@ -1,19 +1,74 @@
+use std::collections::HashMap;
 use std::fs::File;
 use std::path::Path;
 
 use anyhow::{Context, Result};
-use polars::prelude::{DataFrame, ParquetReader, ParquetWriter, SerReader};
+use polars::prelude::{
+    col, DataFrame, DataType, LazyCsvReader, LazyFileListReader, LazyFrame, ParquetReader,
+    ParquetWriteOptions, SerReader,
+};
 
+use crate::storage::compute_column_max_chars;
+
+const METRICS_BATCH_ROWS: usize = 50_000;
+
+/// Reads the project frame with every column in a single chunk, so cached
+/// frames can be iterated column-wise without copying on each pass.
 pub fn read_project_dataframe(path: &Path) -> Result<DataFrame> {
     ParquetReader::new(File::open(path)?)
+        .set_rechunk(true)
         .finish()
         .context("failed to read parquet file")
 }
 
-pub fn write_project_dataframe(path: &Path, df: &mut DataFrame) -> Result<()> {
+pub fn scan_csv(path: &Path) -> Result<LazyFrame> {
+    LazyCsvReader::new(path)
+        .finish()
+        .with_context(|| format!("failed to scan csv file {:?}", path))
+}
+
+/// Streams a CSV file into the project parquet file in bounded batches, dropping
+/// `drop_columns` and adding the `__rowid` column, without materializing the
+/// whole CSV in memory.
+pub fn import_csv_to_parquet(source: &Path, dest: &Path, drop_columns: &[&str]) -> Result<()> {
+    scan_csv(source)?
+        .drop(drop_columns.iter().copied())
+        .with_row_index("__rowid", None)
+        .with_column(col("__rowid").cast(DataType::Int64))
+        .sink_parquet(
+            dest.to_path_buf(),
+            ParquetWriteOptions {
+                // Rows are addressed by physical position everywhere, so batches
+                // must be written in input order
+                maintain_order: true,
+                ..Default::default()
+            },
+        )
+        .with_context(|| format!("failed to convert {:?} to parquet", source))
+}
+
+/// Reads a project parquet file in row batches, returning its row count and the
+/// per-column display widths without holding the whole frame in memory.
+pub fn scan_project_metrics(path: &Path) -> Result<(usize, HashMap<String, usize>)> {
     let file =
-        File::create(path).with_context(|| format!("failed to create parquet file {:?}", path))?;
-    let writer = ParquetWriter::new(file);
-    writer.finish(df).context("failed to write parquet file")?;
-    Ok(())
+        File::open(path).with_context(|| format!("failed to open parquet file {:?}", path))?;
+    let mut reader = ParquetReader::new(file)
+        .batched(METRICS_BATCH_ROWS)
+        .context("failed to read parquet file")?;
+    let mut row_count = 0;
+    let mut column_max_chars: HashMap<String, usize> = HashMap::new();
+    while let Some(batches) = reader
+        .next_batches(1)
+        .context("failed to read parquet batch")?
+    {
+        for mut batch in batches {
+            batch.as_single_chunk_par();
+            row_count += batch.height();
+            for (column, width) in compute_column_max_chars(&batch) {
+                let entry = column_max_chars.entry(column).or_insert(0);
+                *entry = (*entry).max(width);
+            }
+        }
+    }
+    Ok((row_count, column_max_chars))
 }
@@ -1,6 +1,7 @@
 use std::collections::HashMap;
 
 use polars::prelude::Series;
+use rayon::prelude::*;
 
 use crate::value_utils::anyvalue_to_search_string;
 
@@ -228,6 +229,27 @@ pub fn tokenize_search_query(input: &str) -> Vec<SearchToken> {
     with_and
 }
 
+/// Collects the distinct non-empty `(column, text)` terms of a query along with the
+/// column names referenced by `column:term` operands.
+pub fn extract_terms(tokens: &[SearchToken]) -> (Vec<(Option<String>, String)>, Vec<String>) {
+    let mut terms: Vec<(Option<String>, String)> = Vec::new();
+    let mut needed_cols: Vec<String> = Vec::new();
+    for token in tokens {
+        if let SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } = token {
+            let key = (col.clone(), text.clone());
+            if !text.is_empty() && !terms.contains(&key) {
+                terms.push(key);
+            }
+            if let Some(column_name) = col {
+                if !needed_cols.contains(column_name) {
+                    needed_cols.push(column_name.clone());
+                }
+            }
+        }
+    }
+    (terms, needed_cols)
+}
+
 pub fn to_rpn(tokens: &[SearchToken]) -> Vec<SearchToken> {
     // Shunting-yard without parentheses. Precedence: NOT(3, right), AND(2, left), OR(1, left)
     fn precedence(tok: &SearchToken) -> (u8, bool) {
@@ -270,7 +292,6 @@ pub fn to_rpn(tokens: &[SearchToken]) -> Vec<SearchToken> {
     output
 }
 
-
 #[allow(clippy::too_many_arguments)]
 pub fn build_search_mask_boolean(
     rpn: &[SearchToken],
@@ -286,64 +307,62 @@ pub fn build_search_mask_boolean(
         if key_masks.contains_key(&key) {
             continue;
         }
-        let mut mask = vec![false; searchable_text.len()];
-        match (col_opt.as_ref().map(|c| c.to_lowercase()), per_column) {
-            (Some(col), Some(per_col)) => {
-                if let Some(col_texts) = per_col.get(&col) {
-                    for i in 0..searchable_text.len() {
-                        if let Some(t) = col_texts.get(i) {
-                            if !t.is_empty() && t.contains(term) {
-                                mask[i] = true;
-                            }
-                        }
-                    }
-                }
-            }
-            _ => {
-                for i in 0..searchable_text.len() {
-                    if !searchable_text[i].is_empty() && searchable_text[i].contains(term) {
-                        mask[i] = true;
-                    }
-                }
-            }
-        }
+        // Substring scans are independent per row, so split them across the rayon pool
+        let row_count = searchable_text.len();
+        let mask: Vec<bool> = match (col_opt.as_ref().map(|c| c.to_lowercase()), per_column) {
+            (Some(col), Some(per_col)) => match per_col.get(&col) {
+                Some(col_texts) => (0..row_count)
+                    .into_par_iter()
+                    .map(|i| {
+                        col_texts
+                            .get(i)
+                            .map(|t| !t.is_empty() && t.contains(term.as_str()))
+                            .unwrap_or(false)
+                    })
+                    .collect(),
+                None => vec![false; row_count],
+            },
+            _ => searchable_text
+                .par_iter()
+                .map(|t| !t.is_empty() && t.contains(term.as_str()))
+                .collect(),
+        };
         key_masks.insert(key, mask);
     }
 
-    // Evaluate per row
-    let mut mask_out = vec![false; searchable_text.len()];
-    for i in 0..searchable_text.len() {
-        let mut stack: Vec<bool> = Vec::new();
-        for tok in rpn {
-            match tok {
-                SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } => {
-                    let key = (col.clone(), text.clone());
-                    let v = key_masks
-                        .get(&key)
-                        .and_then(|m| m.get(i))
-                        .copied()
-                        .unwrap_or(false);
-                    stack.push(v);
-                }
-                SearchToken::Not => {
-                    let a = stack.pop().unwrap_or(false);
-                    stack.push(!a);
-                }
-                SearchToken::And => {
-                    let b = stack.pop().unwrap_or(false);
-                    let a = stack.pop().unwrap_or(false);
-                    stack.push(a && b);
-                }
-                SearchToken::Or => {
-                    let b = stack.pop().unwrap_or(false);
-                    let a = stack.pop().unwrap_or(false);
-                    stack.push(a || b);
-                }
+    // Evaluate the RPN once over whole-column masks instead of once per row
+    let row_count = searchable_text.len();
+    let mut stack: Vec<Vec<bool>> = Vec::new();
+    for tok in rpn {
+        match tok {
+            SearchToken::Term { col, text } | SearchToken::QuotedTerm { col, text } => {
+                let key = (col.clone(), text.clone());
+                let mask = key_masks
+                    .get(&key)
+                    .cloned()
+                    .unwrap_or_else(|| vec![false; row_count]);
+                stack.push(mask);
+            }
+            SearchToken::Not => {
+                let mut a = stack.pop().unwrap_or_else(|| vec![false; row_count]);
+                a.iter_mut().for_each(|v| *v = !*v);
+                stack.push(a);
+            }
+            SearchToken::And => {
+                let b = stack.pop().unwrap_or_else(|| vec![false; row_count]);
+                let mut a = stack.pop().unwrap_or_else(|| vec![false; row_count]);
+                a.iter_mut().zip(&b).for_each(|(x, y)| *x = *x && *y);
+                stack.push(a);
+            }
+            SearchToken::Or => {
+                let b = stack.pop().unwrap_or_else(|| vec![false; row_count]);
+                let mut a = stack.pop().unwrap_or_else(|| vec![false; row_count]);
+                a.iter_mut().zip(&b).for_each(|(x, y)| *x = *x || *y);
+                stack.push(a);
             }
         }
-        mask_out[i] = stack.pop().unwrap_or(false);
     }
-    mask_out
+    stack.pop().unwrap_or_else(|| vec![false; row_count])
 }
 
 pub fn build_searchable_text(
@@ -354,20 +373,19 @@ pub fn build_searchable_text(
     let mut searchable_text: Vec<String> = vec![String::new(); row_count];
     for col in search_cols {
         if let Some(series) = column_series.get(col.as_str()) {
-            for row_idx in 0..row_count {
-                if let Ok(value) = series.get(row_idx) {
-                    if let Some(text) = anyvalue_to_search_string(&value) {
-                        let lower = text.to_lowercase();
-                        if lower.is_empty() {
-                            continue;
-                        }
-                        let entry = &mut searchable_text[row_idx];
-                        if entry.is_empty() {
-                            entry.push_str(&lower);
-                        } else {
-                            entry.push(' ');
-                            entry.push_str(&lower);
-                        }
+            // Walk the column sequentially instead of a per-row random-access get;
+            // cached frames are loaded as single chunks, so no rechunk copy is needed
+            for (entry, value) in searchable_text.iter_mut().zip(series.iter()) {
+                if let Some(text) = anyvalue_to_search_string(&value) {
+                    let lower = text.to_lowercase();
+                    if lower.is_empty() {
+                        continue;
+                    }
+                    if entry.is_empty() {
+                        entry.push_str(&lower);
+                    } else {
+                        entry.push(' ');
+                        entry.push_str(&lower);
                     }
                 }
             }
@@ -390,3 +408,28 @@ pub fn ensure_searchable_text<'a>(
     }
     storage.as_ref().unwrap()
 }
+
+/// Ensures lowercase string caches exist for a column, returning the cached vector.
+pub fn ensure_column_text_cache<'a>(
+    column: &str,
+    column_series_lower: &HashMap<String, &Series>,
+    cache: &'a mut HashMap<String, Vec<String>>,
+    row_count: usize,
+) -> &'a Vec<String> {
+    let key = column.to_lowercase();
+    if !cache.contains_key(&key) {
+        let mut col_vec: Vec<String> = vec![String::new(); row_count];
+        if let Some(series) = column_series_lower.get(&key) {
+            for (slot, value) in col_vec.iter_mut().zip(series.iter()) {
+                if let Some(text) = anyvalue_to_search_string(&value) {
+                    let lower = text.to_lowercase();
+                    if !lower.is_empty() {
+                        *slot = lower;
+                    }
+                }
+            }
+        }
+        cache.insert(key.clone(), col_vec);
+    }
+    cache.get(&key).expect("column cache must exist")
+}
@@ -4,7 +4,11 @@ use anyhow::{Context, Result};
 use parking_lot::Mutex;
 use uuid::Uuid;
 
-use crate::{models::ProjectMeta, storage::load_flags};
+use crate::{
+    frame_cache::{FrameCache, DEFAULT_FRAME_CACHE_BYTES},
+    models::ProjectMeta,
+    storage::load_flags,
+};
 
 pub struct ProjectsStore {
     root_dir: PathBuf,
@@ -79,10 +83,11 @@ impl ProjectsStore {
         self.persist_locked(&guard)
     }
 
-    pub fn update_flagged_records(&self, id: &Uuid, flagged_records: usize) -> Result<()> {
+    /// Adjusts the cached flagged-row counter by `delta` without rescanning the flags store.
+    pub fn adjust_flagged_records(&self, id: &Uuid, delta: isize) -> Result<()> {
         let mut guard = self.inner.lock();
         if let Some(meta) = guard.iter_mut().find(|meta| &meta.id == id) {
-            meta.flagged_records = flagged_records;
+            meta.flagged_records = meta.flagged_records.saturating_add_signed(delta);
         }
         self.persist_locked(&guard)
     }
@@ -122,6 +127,7 @@ impl ProjectsStore {
 
 pub struct AppState {
     pub projects: ProjectsStore,
+    pub frames: FrameCache,
 }
 
 impl AppState {
@@ -132,6 +138,9 @@ impl AppState {
         fs::create_dir_all(&base_dir)
             .with_context(|| format!("failed to create app data dir {:?}", base_dir))?;
         let projects = ProjectsStore::new(base_dir)?;
-        Ok(Self { projects })
+        Ok(Self {
+            projects,
+            frames: FrameCache::new(DEFAULT_FRAME_CACHE_BYTES),
+        })
     }
 }
@@ -2,10 +2,13 @@ use std::{
     collections::HashMap,
     fs,
     path::{Path, PathBuf},
+    sync::{Arc, OnceLock},
 };
 
 use anyhow::{Context, Result};
+use parking_lot::Mutex;
 use polars::prelude::DataFrame;
+use serde::{Deserialize, Serialize};
 use sled::Db;
 
 use crate::{
@@ -13,8 +16,51 @@ use crate::{
     value_utils::{anyvalue_to_json, value_display_length},
 };
 
-const SEARCHABLE_CACHE_KEY: &[u8] = b"searchable_cache";
-const IOC_FLAG_CACHE_KEY: &[u8] = b"ioc_flag_cache";
+const SEARCHABLE_CACHE_KEY: &[u8] = b"searchable_text";
+const LEGACY_SEARCHABLE_CACHE_KEY: &[u8] = b"searchable_cache";
+const IOC_FLAG_CACHE_KEY: &[u8] = b"ioc_flag_ranks";
+const LEGACY_IOC_FLAG_CACHE_KEY: &[u8] = b"ioc_flag_cache";
+// sled defaults to a 1 GiB page cache per database; every project keeps two
+// databases open, so cap each one well below that
+const DB_CACHE_CAPACITY_BYTES: u64 = 64 * 1024 * 1024;
+const FLAG_WRITE_BATCH_SIZE: usize = 5_000;
+// Two databases per project, so this keeps the handles of the last few projects
+const MAX_OPEN_DBS: usize = 8;
+
+struct PooledDb {
+    db: Arc<Db>,
+    last_used: u64,
+}
+
+#[derive(Default)]
+struct DbPool {
+    entries: HashMap<PathBuf, PooledDb>,
+    clock: u64,
+}
+
+impl DbPool {
+    /// Closes least recently used handles until there is room for one more.
+    /// Handles still borrowed by a running command are skipped, since sled
+    /// refuses to reopen a database whose previous instance is still alive.
+    fn evict_idle(&mut self) {
+        while self.entries.len() >= MAX_OPEN_DBS {
+            let oldest = self
+                .entries
+                .iter()
+                .filter(|(_, entry)| Arc::strong_count(&entry.db) == 1)
+                .min_by_key(|(_, entry)| entry.last_used)
+                .map(|(path, _)| path.clone());
+            let Some(path) = oldest else {
+                break;
+            };
+            self.entries.remove(&path);
+        }
+    }
+}
+
+// sled handles stay open across commands so repeated access to recently used
+// projects skips the open/recovery cost; the pool is bounded by MAX_OPEN_DBS
+static OPEN_DBS: OnceLock<Mutex<DbPool>> = OnceLock::new();
 
 fn encode_row_key(row_index: usize) -> [u8; 8] {
     (row_index as u64).to_be_bytes()
@@ -37,20 +83,84 @@ fn cache_db_path(project_dir: &Path) -> PathBuf {
     project_dir.join("cache.db")
 }
 
-fn open_flags_db(path: &Path) -> Result<Db> {
+fn db_config(path: &Path) -> sled::Config {
+    // Single-row flag edits rely on sled's periodic background flush rather than
+    // an fsync per write; bulk rewrites still flush explicitly before returning.
+    sled::Config::new()
+        .path(path)
+        .mode(sled::Mode::HighThroughput)
+        .cache_capacity(DB_CACHE_CAPACITY_BYTES)
+}
+
+fn open_pooled_db(path: &Path, kind: &str) -> Result<Arc<Db>> {
+    let mut guard = OPEN_DBS
+        .get_or_init(|| Mutex::new(DbPool::default()))
+        .lock();
+    let pool = &mut *guard;
+    pool.clock += 1;
+    if let Some(entry) = pool.entries.get_mut(path) {
+        entry.last_used = pool.clock;
+        return Ok(entry.db.clone());
+    }
+    // Databases live inside a project directory created at import; never
+    // recreate one that a concurrent delete has already removed
     if let Some(parent) = path.parent() {
-        fs::create_dir_all(parent)
-            .with_context(|| format!("failed to create flags db dir {:?}", parent))?;
+        if !parent.exists() {
+            anyhow::bail!("{} db dir {:?} no longer exists", kind, parent);
+        }
     }
-    sled::open(path).with_context(|| format!("failed to open flags db at {:?}", path))
+    let db = Arc::new(
+        db_config(path)
+            .open()
+            .with_context(|| format!("failed to open {} db at {:?}", kind, path))?,
+    );
+    pool.evict_idle();
+    pool.entries.insert(
+        path.to_path_buf(),
+        PooledDb {
+            db: db.clone(),
+            last_used: pool.clock,
+        },
+    );
+    Ok(db)
 }
 
-fn open_cache_db(path: &Path) -> Result<Db> {
-    if let Some(parent) = path.parent() {
-        fs::create_dir_all(parent)
-            .with_context(|| format!("failed to create cache db dir {:?}", parent))?;
+fn open_flags_db(path: &Path) -> Result<Arc<Db>> {
+    open_pooled_db(path, "flags")
+}
+
+fn open_cache_db(path: &Path) -> Result<Arc<Db>> {
+    open_pooled_db(path, "cache")
+}
+
+/// Flushes every pooled database; used on shutdown since statics are never dropped.
+pub fn flush_open_dbs() {
+    let Some(registry) = OPEN_DBS.get() else {
+        return;
+    };
+    for (path, entry) in registry.lock().entries.iter() {
+        if let Err(err) = entry.db.flush() {
+            eprintln!("[storage] failed to flush db {:?}: {:?}", path, err);
+        }
     }
-    sled::open(path).with_context(|| format!("failed to open cache db at {:?}", path))
+}
+
+/// Flushes and drops the pooled handles of every database under `project_dir`,
+/// releasing their files so the directory can be removed. Callers hold the
+/// project lock, so no command is still using these handles.
+pub fn close_project_dbs(project_dir: &Path) {
+    let Some(registry) = OPEN_DBS.get() else {
+        return;
+    };
+    registry.lock().entries.retain(|path, entry| {
+        if !path.starts_with(project_dir) {
+            return true;
+        }
+        if let Err(err) = entry.db.flush() {
+            eprintln!("[storage] failed to flush db {:?}: {:?}", path, err);
+        }
+        false
+    });
 }
 
 fn read_flags_from_json(path: &Path) -> Result<HashMap<usize, FlagEntry>> {
@@ -62,21 +172,27 @@ fn read_flags_from_json(path: &Path) -> Result<HashMap<usize, FlagEntry>> {
 
 fn write_flags_to_db(path: &Path, flags: &HashMap<usize, FlagEntry>) -> Result<()> {
     let db = open_flags_db(path)?;
-    let mut to_delete: Vec<Vec<u8>> = Vec::new();
-    for result in db.iter() {
-        let (key, _) = result.with_context(|| "failed to iterate existing flag entries")?;
-        to_delete.push(key.as_ref().to_vec());
-    }
-    for key in to_delete {
-        db.remove(key)
-            .with_context(|| "failed to clear existing flag entry")?;
-    }
+    db.clear()
+        .with_context(|| "failed to clear existing flag entries")?;
+    // Apply inserts as atomic batches so a bulk import is a handful of log
+    // writes with a single flush at the end
+    let mut batch = sled::Batch::default();
+    let mut batch_len = 0;
     for (row_index, entry) in flags {
         let key = encode_row_key(*row_index);
         let value = serde_json::to_vec(entry)
             .with_context(|| format!("failed to serialize flag entry for row {}", row_index))?;
-        db.insert(key, value)
-            .with_context(|| format!("failed to persist flag entry for row {}", row_index))?;
+        batch.insert(&key[..], value);
+        batch_len += 1;
+        if batch_len == FLAG_WRITE_BATCH_SIZE {
+            db.apply_batch(std::mem::take(&mut batch))
+                .with_context(|| "failed to persist flag entry batch")?;
+            batch_len = 0;
+        }
+    }
+    if batch_len > 0 {
+        db.apply_batch(batch)
+            .with_context(|| "failed to persist flag entry batch")?;
     }
     db.flush()
         .with_context(|| format!("failed to flush flags db {:?}", path))?;
@@ -118,6 +234,53 @@ pub fn load_flags(path: &Path) -> Result<HashMap<usize, FlagEntry>> {
     Ok(HashMap::new())
 }
 
+/// Loads flag entries only for the given rows, using a single key-range scan
+/// when the rows are contiguous and point lookups otherwise.
+pub fn load_flags_for_rows(
+    path: &Path,
+    row_indices: &[usize],
+) -> Result<HashMap<usize, FlagEntry>> {
+    let db_path = flags_db_path(path);
+    if !db_path.exists() {
+        // Legacy JSON flags still need the full migrating load
+        let mut flags = load_flags(path)?;
+        return Ok(row_indices
+            .iter()
+            .filter_map(|idx| flags.remove_entry(idx))
+            .collect());
+    }
+    let db = open_flags_db(&db_path)?;
+    let mut map = HashMap::new();
+    let is_contiguous = row_indices.windows(2).all(|pair| pair[1] == pair[0] + 1);
+    if let (true, Some(&first), Some(&last)) =
+        (is_contiguous, row_indices.first(), row_indices.last())
+    {
+        // Big-endian keys sort in row order, so a page maps to one ordered range
+        for result in db.range(encode_row_key(first)..=encode_row_key(last)) {
+            let (key, value) = result.with_context(|| "failed to scan flag entries")?;
+            let Some(idx) = decode_row_key(key.as_ref()) else {
+                continue;
+            };
+            let entry: FlagEntry = serde_json::from_slice(&value)
+                .with_context(|| format!("failed to deserialize flag entry for row {}", idx))?;
+            map.insert(idx, entry);
+        }
+        return Ok(map);
+    }
+    for &row_index in row_indices {
+        let value = db
+            .get(encode_row_key(row_index))
+            .with_context(|| format!("failed to read flag entry for row {}", row_index))?;
+        if let Some(value) = value {
+            let entry: FlagEntry = serde_json::from_slice(&value).with_context(|| {
+                format!("failed to deserialize flag entry for row {}", row_index)
+            })?;
+            map.insert(row_index, entry);
+        }
+    }
+    Ok(map)
+}
+
 pub fn save_flags(path: &Path, flags: &HashMap<usize, FlagEntry>) -> Result<()> {
     let db_path = flags_db_path(path);
     write_flags_to_db(&db_path, flags)?;
@@ -176,60 +339,94 @@ pub fn compute_column_max_chars(df: &DataFrame) -> HashMap<String, usize> {
     column_max_chars
 }
 
-pub fn upsert_flag(path: &Path, row_index: usize, entry: &FlagEntry) -> Result<()> {
+fn decode_previous_entry(previous: Option<sled::IVec>, row_index: usize) -> Option<FlagEntry> {
+    // A corrupt previous value only affects the flagged counter, so treat it as absent
+    previous.and_then(|value| match serde_json::from_slice(&value) {
+        Ok(entry) => Some(entry),
+        Err(err) => {
+            eprintln!(
+                "[flags] failed to parse previous flag entry for row {}: {:?}",
+                row_index, err
+            );
+            None
+        }
+    })
+}
+
+/// Stores a flag entry and returns the entry it replaced, if any.
+pub fn upsert_flag(path: &Path, row_index: usize, entry: &FlagEntry) -> Result<Option<FlagEntry>> {
     let db = open_flags_db(&flags_db_path(path))?;
     let key = encode_row_key(row_index);
     let value = serde_json::to_vec(entry)
         .with_context(|| format!("failed to serialize flag entry for row {}", row_index))?;
-    db.insert(key, value)
+    let previous = db
+        .insert(key, value)
         .with_context(|| format!("failed to persist flag entry for row {}", row_index))?;
-    db.flush()
-        .with_context(|| format!("failed to flush flag entry for row {}", row_index))?;
-    Ok(())
+    Ok(decode_previous_entry(previous, row_index))
 }
 
-pub fn remove_flag(path: &Path, row_index: usize) -> Result<()> {
+/// Deletes a flag entry and returns the removed entry, if any.
+pub fn remove_flag(path: &Path, row_index: usize) -> Result<Option<FlagEntry>> {
     let db = open_flags_db(&flags_db_path(path))?;
     let key = encode_row_key(row_index);
-    db.remove(key)
+    let previous = db
+        .remove(key)
         .with_context(|| format!("failed to delete flag entry for row {}", row_index))?;
+    Ok(decode_previous_entry(previous, row_index))
+}
+
+/// Flushes pending flag writes to disk.
+pub fn flush_flags(path: &Path) -> Result<()> {
+    let db_path = flags_db_path(path);
+    let db = open_flags_db(&db_path)?;
     db.flush()
-        .with_context(|| format!("failed to flush flags db while deleting row {}", row_index))?;
+        .with_context(|| format!("failed to flush flags db {:?}", db_path))?;
     Ok(())
 }
 
-pub fn count_flagged(path: &Path) -> Result<usize> {
-    let db = open_flags_db(&flags_db_path(path))?;
-    let mut count = 0;
-    for result in db.iter() {
-        let (_, value) = result.with_context(|| "failed to iterate flag entries for counting")?;
-        let entry: FlagEntry = serde_json::from_slice(&value)
-            .context("failed to parse flag entry while counting flagged rows")?;
-        if !entry.flag.trim().is_empty() {
-            count += 1;
-        }
-    }
-    Ok(count)
+// Searchable text is only valid for the column set it was built from
+#[derive(Deserialize)]
+struct SearchableCache {
+    columns: Vec<String>,
+    text: Vec<String>,
 }
 
-pub fn load_searchable_cache(project_dir: &Path) -> Result<Option<Vec<String>>> {
+#[derive(Serialize)]
+struct SearchableCacheRef<'a> {
+    columns: &'a [String],
+    text: &'a [String],
+}
+
+/// Loads the cached per-row searchable text if it was built from exactly `columns`.
+pub fn load_searchable_cache(
+    project_dir: &Path,
+    columns: &[String],
+) -> Result<Option<Vec<String>>> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
     match db.get(SEARCHABLE_CACHE_KEY) {
         Ok(Some(value)) => {
-            let cache: Vec<String> =
+            let cache: SearchableCache =
                 serde_json::from_slice(&value).context("failed to deserialize searchable cache")?;
-            Ok(Some(cache))
+            Ok((cache.columns == columns).then_some(cache.text))
         }
         Ok(None) => Ok(None),
         Err(err) => Err(err).with_context(|| "failed to read searchable cache"),
     }
 }
 
-pub fn save_searchable_cache(project_dir: &Path, cache: &[String]) -> Result<()> {
+pub fn save_searchable_cache(
+    project_dir: &Path,
+    columns: &[String],
+    text: &[String],
+) -> Result<()> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
-    let data = serde_json::to_vec(cache).context("failed to serialize searchable cache")?;
+    let cache = SearchableCacheRef { columns, text };
+    let data = serde_json::to_vec(&cache).context("failed to serialize searchable cache")?;
     db.insert(SEARCHABLE_CACHE_KEY, data)
         .with_context(|| "failed to persist searchable cache")?;
+    // Drop the unscoped cache written by older versions
+    db.remove(LEGACY_SEARCHABLE_CACHE_KEY)
+        .with_context(|| "failed to clear legacy searchable cache")?;
     db.flush()
         .with_context(|| "failed to flush searchable cache db")?;
     Ok(())
@@ -239,29 +436,30 @@ pub fn clear_searchable_cache(project_dir: &Path) -> Result<()> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
     db.remove(SEARCHABLE_CACHE_KEY)
         .with_context(|| "failed to clear searchable cache")?;
+    db.remove(LEGACY_SEARCHABLE_CACHE_KEY)
+        .with_context(|| "failed to clear legacy searchable cache")?;
     db.flush()
         .with_context(|| "failed to flush searchable cache db")?;
     Ok(())
 }
 
-pub fn load_ioc_flag_cache(project_dir: &Path) -> Result<Option<Vec<String>>> {
+/// Loads the cached per-row IOC flag ranks (one `severity_rank` byte per row).
+pub fn load_ioc_flag_cache(project_dir: &Path) -> Result<Option<Vec<u8>>> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
     match db.get(IOC_FLAG_CACHE_KEY) {
-        Ok(Some(value)) => {
-            let cache: Vec<String> =
-                serde_json::from_slice(&value).context("failed to deserialize IOC flag cache")?;
-            Ok(Some(cache))
-        }
+        Ok(Some(value)) => Ok(Some(value.to_vec())),
         Ok(None) => Ok(None),
         Err(err) => Err(err).with_context(|| "failed to read IOC flag cache"),
     }
 }
 
-pub fn save_ioc_flag_cache(project_dir: &Path, cache: &[String]) -> Result<()> {
+pub fn save_ioc_flag_cache(project_dir: &Path, ranks: &[u8]) -> Result<()> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
-    let data = serde_json::to_vec(cache).context("failed to serialize IOC flag cache")?;
-    db.insert(IOC_FLAG_CACHE_KEY, data)
+    db.insert(IOC_FLAG_CACHE_KEY, ranks)
         .with_context(|| "failed to persist IOC flag cache")?;
+    // Drop the JSON cache written by older versions
+    db.remove(LEGACY_IOC_FLAG_CACHE_KEY)
+        .with_context(|| "failed to clear legacy IOC flag cache")?;
     db.flush()
         .with_context(|| "failed to flush IOC flag cache db")?;
     Ok(())
@@ -271,6 +469,8 @@ pub fn clear_ioc_flag_cache(project_dir: &Path) -> Result<()> {
     let db = open_cache_db(&cache_db_path(project_dir))?;
     db.remove(IOC_FLAG_CACHE_KEY)
         .with_context(|| "failed to clear IOC flag cache")?;
+    db.remove(LEGACY_IOC_FLAG_CACHE_KEY)
+        .with_context(|| "failed to clear legacy IOC flag cache")?;
     db.flush()
         .with_context(|| "failed to flush IOC flag cache db")?;
     Ok(())